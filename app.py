@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, g
 from collections import OrderedDict
 import os
 import yfinance as yf
@@ -6,36 +6,152 @@ import pandas as pd
 import logging
 from logging.handlers import RotatingFileHandler
 from functools import wraps
+import pickle
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import orjson
 from investment import calculate_strategies
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cache yfinance responses in memory and on disk to avoid refetching on every request
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+CACHE_TTL_SECONDS = int(os.environ.get("YFINANCE_CACHE_TTL", 12 * 60 * 60))
+
+# Fetch yfinance info and history concurrently off the request thread
+YFINANCE_EXECUTOR = ThreadPoolExecutor(max_workers=16)
+INFO_TIMEOUT_SECONDS = 10
+HISTORY_TIMEOUT_SECONDS = 15
+
+MEMORY_CACHE_SIZE = 512
+_memory_cache = OrderedDict()  # (kind, ticker) -> (fetched_at, result), least recently used first
+_memory_cache_lock = threading.Lock()
+
+# How each kind of cached yfinance result is fetched
+_FETCHERS = {
+    'info': lambda ticker: yf.Ticker(ticker).info,
+    'history': lambda ticker: yf.Ticker(ticker).history(period="max"),
+}
+
+def _cache_path(kind, ticker):
+    """Path of the disk cache file for a ticker, or None if the ticker is not a plain file name."""
+    if not ticker or ticker.startswith('.') or '\0' in ticker or os.path.basename(ticker) != ticker:
+        return None
+    return os.path.join(CACHE_DIR, f"{ticker}.{kind}.pkl")
+
+def _remember(kind, ticker, result, fetched_at):
+    """Store a result in the in-memory LRU cache."""
+    with _memory_cache_lock:
+        _memory_cache[(kind, ticker)] = (fetched_at, result)
+        _memory_cache.move_to_end((kind, ticker))
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+def get_cached(kind, ticker):
+    """Return a fresh cached yfinance result from memory or disk without fetching, or None on a miss."""
+    now = time.time()
+    with _memory_cache_lock:
+        entry = _memory_cache.get((kind, ticker))
+        if entry is not None and now - entry[0] < CACHE_TTL_SECONDS:
+            _memory_cache.move_to_end((kind, ticker))
+            return entry[1]
+
+    path = _cache_path(kind, ticker)
+    if path is None:
+        return None
+    try:
+        fetched_at = os.path.getmtime(path)
+        if now - fetched_at >= CACHE_TTL_SECONDS:
+            return None
+        with open(path, 'rb') as f:
+            result = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        # Unreadable or incompatible pickles (e.g. from another pandas version) are a cache miss
+        logger.warning("Ignoring unreadable cache for %s: %s", ticker, e)
+        return None
+    _remember(kind, ticker, result, fetched_at)
+    return result
+
+def fetch(kind, ticker):
+    """Fetch a yfinance result and store it in the memory and disk caches."""
+    result = _FETCHERS[kind](ticker)
+    fetched_at = time.time()
+    _remember(kind, ticker, result, fetched_at)
+
+    path = _cache_path(kind, ticker)
+    if path is not None and result is not None and len(result) > 0:
+        # Write to a temp file and rename it so readers never see a partial pickle
+        tmp_path = None
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(result, f)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError) as e:
+            logger.warning("Could not write cache for %s: %s", ticker, e)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return result
+
+def submit_on_miss(kind, ticker):
+    """
+    Return a future for a yfinance result. Cache hits are resolved on the calling
+    thread; only misses are fetched on YFINANCE_EXECUTOR.
+    """
+    result = get_cached(kind, ticker)
+    if result is None:
+        return YFINANCE_EXECUTOR.submit(fetch, kind, ticker)
+    future = Future()
+    future.set_result(result)
+    return future
+
+# Yahoo Finance symbols: letters, digits, '.', '-', '=' and a leading '^' for indices,
+# at most 10 characters in total
+TICKER_PATTERN = re.compile(r'(?=.{1,10}\Z)\^?[A-Za-z0-9.=\-]+')
+
+# Fields every analysis request must provide
+REQUIRED_FIELDS = ['ticker', 'amount', 'frequency', 'timeline', 'trailingPercentage']
+
 def validate_input(f):
     """Decorator to validate input parameters for routes."""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if request.is_json:
-            data = request.get_json()
-            if 'ticker' in data:
-                if not isinstance(data['ticker'], str) or len(data['ticker']) > 10:
-                    return jsonify({'error': 'Invalid ticker symbol'}), 400
-            if 'amount' in data:
-                try:
-                    amount = float(data['amount'])
-                    if amount <= 0:
-                        return jsonify({'error': 'Amount must be positive'}), 400
-                except ValueError:
-                    return jsonify({'error': 'Invalid amount value'}), 400
-            if 'frequency' in data and data['frequency'] not in ['Daily', 'Weekly', 'Bi-Weekly', 'Monthly', 'Annual']:
-                return jsonify({'error': 'Invalid frequency value'}), 400
+        # Parse the body once and share it with the route through flask.g
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Invalid JSON payload'}), 400
+        g.json_data = data
+        missing = [field for field in REQUIRED_FIELDS if field not in data]
+        if missing:
+            return jsonify({'error': f'Missing required fields: {", ".join(missing)}'}), 400
+        if not isinstance(data['ticker'], str) or not TICKER_PATTERN.fullmatch(data['ticker']):
+            return jsonify({'error': 'Invalid ticker symbol'}), 400
+        try:
+            amount = float(data['amount'])
+            if amount <= 0:
+                return jsonify({'error': 'Amount must be positive'}), 400
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid amount value'}), 400
+        if data['frequency'] not in ['Daily', 'Weekly', 'Bi-Weekly', 'Monthly', 'Annual']:
+            return jsonify({'error': 'Invalid frequency value'}), 400
         return f(*args, **kwargs)
     return decorated_function
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY") or "a secret key"
 
+def json_response(obj):
+    """Serialize a large response payload with orjson, which handles NumPy values natively."""
+    return app.response_class(orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY), mimetype='application/json')
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -58,29 +174,32 @@ def analyze():
     Returns:
         JSON with analysis results or error message
     """
+    data = g.json_data
+    ticker = data['ticker'].upper()  # Presence and type checked by validate_input
     try:
-        data = request.get_json()
-        ticker = data['ticker'].upper()
         amount = float(data['amount'])
         frequency = data['frequency']
         timeline = int(data['timeline'])
         trailing_percentage = float(data['trailingPercentage'])
         
-        logger.info(f"Analyzing {ticker} with amount={amount}, frequency={frequency}, "
-                   f"timeline={timeline}, trailing_percentage={trailing_percentage}")
+        logger.info("Analyzing %s with amount=%s, frequency=%s, timeline=%s, trailing_percentage=%s",
+                    ticker, amount, frequency, timeline, trailing_percentage)
+
+        # Info and history are independent, so fetch any cache misses in parallel
+        info_future = submit_on_miss('info', ticker)
+        history_future = submit_on_miss('history', ticker)
 
         try:
-            stock = yf.Ticker(ticker)
             # Validate ticker exists and get stock info
-            info = stock.info
+            info = info_future.result(timeout=INFO_TIMEOUT_SECONDS)
             if not info:
-                logger.error(f"Invalid ticker symbol: {ticker}")
+                logger.error("Invalid ticker symbol: %s", ticker)
                 return jsonify({'error': f'Invalid ticker symbol: {ticker}'})
             
             # Get stock name, fallback to ticker if not available
             stock_name = info.get('longName', ticker)
         except Exception as e:
-            logger.error(f"Error fetching ticker {ticker}: {str(e)}")
+            logger.error("Error fetching ticker %s: %s", ticker, e)
             return jsonify({'error': f'Error fetching ticker {ticker}: {str(e)}'})
 
         # Map the timeline value to the appropriate period string
@@ -100,7 +219,7 @@ def analyze():
             next_largest_period = 'max'
 
         # Always get maximum available history
-        hist_data_full = stock.history(period="max")  # Get complete history
+        hist_data_full = history_future.result(timeout=HISTORY_TIMEOUT_SECONDS)  # Get complete history
         
         if hist_data_full.empty:
             return jsonify({'error': f'No data available for {ticker}'})
@@ -108,14 +227,14 @@ def analyze():
         # Create filtered dataset for the specified timeline
         end_date = hist_data_full.index[-1]
         start_date = end_date - pd.DateOffset(months=timeline)
-        hist_data = hist_data_full.loc[start_date:end_date].copy()
+        hist_data = hist_data_full.loc[start_date:end_date]
 
         if hist_data.empty:
             return jsonify({'error': f'Insufficient data for the specified timeline'})
 
         # Pass both full and filtered data to calculate_strategies
         analysis_results = calculate_strategies(hist_data, hist_data_full, amount, frequency, timeline, trailing_percentage)
-        logger.info(f"Stock lifetime calculation - Start date: {hist_data_full.index[0]}, End date: {hist_data_full.index[-1]}")
+        logger.info("Stock lifetime calculation - Start date: %s, End date: %s", hist_data_full.index[0], hist_data_full.index[-1])
         # Add stock information to the response
         analysis_results['stock_info'] = {
             'name': stock_name,
@@ -124,13 +243,14 @@ def analyze():
         
         # Log rolling returns data for debugging
         if 'summary' in analysis_results and 'rolling_returns' in analysis_results['summary']:
-            logger.info(f"Rolling returns data: {analysis_results['summary']['rolling_returns']}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Rolling returns data: %s", analysis_results['summary']['rolling_returns'])
         else:
             logger.warning("Rolling returns data not found in analysis results")
             
-        return jsonify(analysis_results)
+        return json_response(analysis_results)
     except Exception as e:
-        print(f"Error analyzing {ticker}: {str(e)}")
+        logger.error("Error analyzing %s: %s", ticker, e)
         return jsonify({'error': f'Error processing {ticker}: Invalid stock symbol or no data available'})
 
 if __name__ == '__main__':
@@ -1,7 +1,59 @@
 from datetime import datetime
+from functools import lru_cache
+import logging
+import numpy as np
 import pandas as pd
 
-def calculate_rolling_returns(hist_data, investment_amount, frequency, trailing_percentage, years=0, months=0):
+try:
+    from numba import njit
+except ImportError:  # fall back to the interpreted loop when numba is unavailable
+    njit = None
+
+logger = logging.getLogger(__name__)
+
+# Enhanced trading frequency mapping with strict business day adherence
+_FREQ_MAP = {
+    'Daily': 'B',     # Business day frequency (excludes weekends and holidays)
+    'Weekly': 'W-FRI',  # Weekly on Friday
+    'Bi-Weekly': '2W-FRI',  # Bi-weekly on Friday
+    'Monthly': 'BME',   # Business month end
+    'Annual': 'BYE'    # Business year end
+}
+
+@lru_cache(maxsize=64)
+def _months_offset(months):
+    """Shared DateOffset for a number of months (offsets are immutable)."""
+    return pd.DateOffset(months=months)
+
+def _trailing_scan_loop(prices, trailing_percentage):
+    """
+    Find the trailing buy signals in a series of prices.
+    A buy triggers when the price has declined by at least trailing_percentage
+    from the highest price seen since the last buy.
+    Returns the indices of the buys and the decline percentage at each buy.
+    """
+    n = prices.shape[0]
+    buy_idx = np.empty(n, np.int64)
+    declines = np.empty(n, np.float64)
+    count = 0
+    highest_price = prices[0]
+    for i in range(n):
+        price = prices[i]
+        if price <= 0:
+            continue
+        decline = (highest_price - price) / highest_price * 100 if highest_price > 0 else 0.0
+        if decline >= trailing_percentage:
+            buy_idx[count] = i
+            declines[count] = decline
+            count += 1
+            highest_price = price  # Reset highest price after purchase
+        if price > highest_price:
+            highest_price = price
+    return buy_idx[:count], declines[:count]
+
+_trailing_scan = njit(cache=True)(_trailing_scan_loop) if njit is not None else _trailing_scan_loop
+
+def calculate_rolling_returns(hist_data, investment_amount, frequency, trailing_percentage, years=0, months=0, resampled_close=None):
     """
     Calculate rolling period returns for different time periods using a fully iterative approach
     Returns a dictionary with returns for different periods (1Y, 5Y, 10Y, 15Y, 20Y, 25Y, All-Time)
@@ -13,6 +65,8 @@ def calculate_rolling_returns(hist_data, investment_amount, frequency, trailing_
     - trailing_percentage: Trailing buy percentage
     - years: Total years of stock data available
     - months: Additional months beyond years
+    - resampled_close: Closing prices of hist_data resampled to the investment frequency
+      (resampled on first use if not provided)
     """
     if hist_data is None or hist_data.empty:
         return {}
@@ -36,10 +90,10 @@ def calculate_rolling_returns(hist_data, investment_amount, frequency, trailing_
     data_length_months = ((end_date - start_date).days // 30)  # Calculate months between dates
     total_months = int(((end_date - start_date).days / 365.25) * 12)  # More accurate month calculation
     
-    print(f"Rolling returns calculation - Data points: {data_length_months}, Total months: {total_months}")
+    logger.debug("Rolling returns calculation - Data points: %s, Total months: %s", data_length_months, total_months)
     
     # Add debug logging
-    print(f"Data length months: {data_length_months}, Total months available: {total_months}")
+    logger.debug("Data length months: %s, Total months available: %s", data_length_months, total_months)
     
     # Include all standard periods if data is available
     periods = {}
@@ -47,12 +101,12 @@ def calculate_rolling_returns(hist_data, investment_amount, frequency, trailing_
         # Include period if we have enough data
         if period_months <= data_length_months:
             periods[period] = period_months
-            print(f"Including period: {period} ({period_months} months)")
+            logger.debug("Including period: %s (%s months)", period, period_months)
         else:
-            print(f"Skipping period: {period} (requires {period_months} months, but only have {data_length_months})")
+            logger.debug("Skipping period: %s (requires %s months, but only have %s)", period, period_months, data_length_months)
     
     # Add debug logging for selected periods
-    print(f"Selected periods for analysis: {list(periods.keys())}")
+    logger.debug("Selected periods for analysis: %s", list(periods.keys()))
     
     results = {}
     
@@ -75,7 +129,7 @@ def calculate_rolling_returns(hist_data, investment_amount, frequency, trailing_
                 'Buy and Hold': price_return
             }
         except Exception as e:
-            print(f"Error calculating simple returns: {str(e)}")
+            logger.warning("Error calculating simple returns: %s", e)
             return None
     
     # Process each period iteratively
@@ -83,13 +137,13 @@ def calculate_rolling_returns(hist_data, investment_amount, frequency, trailing_
         try:
             # Skip if period is longer than available data
             if period_months > data_length_months:
-                print(f"Skipping {period_name} - requires {period_months} months, have {data_length_months}")
+                logger.debug("Skipping %s - requires %s months, have %s", period_name, period_months, data_length_months)
                 continue
                 
             # Get data for this period from the end
             period_end = hist_data.index[-1]
-            period_start = period_end - pd.DateOffset(months=period_months)
-            period_data = hist_data[hist_data.index >= period_start].copy()
+            period_start = period_end - _months_offset(period_months)
+            period_data = hist_data.iloc[hist_data.index.searchsorted(period_start, side='left'):]
             
             # Use simple returns for longer periods to avoid recursion
             if period_months > MAX_LOOKBACK_MONTHS // 2:  # Use simpler calculation for longer periods
@@ -100,29 +154,27 @@ def calculate_rolling_returns(hist_data, investment_amount, frequency, trailing_
             
             # For shorter periods, calculate actual strategy returns
             try:
-                # Prepare data for strategy calculation
-                freq_map = {
-                    'Daily': 'B',
-                    'Weekly': 'W-FRI',
-                    'Bi-Weekly': '2W-FRI',
-                    'Monthly': 'BM',
-                    'Annual': 'BA'
-                }
-                
-                # Efficient resampling for shorter periods
-                resampled_data = period_data.resample(freq_map[frequency])['Close'].agg(['last']).ffill()
-                if resampled_data.empty:
+                if frequency == 'Bi-Weekly':
+                    # 2W-FRI bins are phased from the first timestamp, so resample the period itself
+                    period_close = period_data['Close'].resample(_FREQ_MAP[frequency]).last().ffill()
+                else:
+                    # Slice the period out of the prices resampled once for the full history,
+                    # starting at the bin holding the period's first trading day
+                    if resampled_close is None:
+                        resampled_close = hist_data['Close'].resample(_FREQ_MAP[frequency]).last().ffill()
+                    period_close = resampled_close.iloc[resampled_close.index.searchsorted(period_data.index[0], side='left'):]
+                if period_close.empty:
                     continue
                 
                 # Calculate basic metrics
-                final_value = resampled_data['last'].iloc[-1]
-                initial_value = resampled_data['last'].iloc[0]
+                final_value = period_close.iloc[-1]
+                initial_value = period_close.iloc[0]
                 
                 if initial_value <= 0 or final_value <= 0:
                     continue
                 
                 # Calculate returns for each strategy
-                dca_return = (final_value / resampled_data['last'].mean() - 1) * 100
+                dca_return = (final_value / period_close.mean() - 1) * 100
                 trailing_return = dca_return * 1.1  # Historical average outperformance
                 lump_return = ((final_value - initial_value) / initial_value) * 100
                 
@@ -133,14 +185,14 @@ def calculate_rolling_returns(hist_data, investment_amount, frequency, trailing_
                 }
                 
             except Exception as e:
-                print(f"Error calculating strategy returns for {period_name}: {str(e)}")
+                logger.warning("Error calculating strategy returns for %s: %s", period_name, e)
                 # Fallback to simple returns calculation
                 period_returns = calculate_simple_returns(period_data)
                 if period_returns:
                     results[period_name] = period_returns
                 
         except Exception as e:
-            print(f"Error processing period {period_name}: {str(e)}")
+            logger.warning("Error processing period %s: %s", period_name, e)
             continue
     
     # Calculate All-Time returns
@@ -175,6 +227,8 @@ def calculate_strategies(hist_data, hist_data_full, investment_amount, frequency
         raise ValueError("Timeline must be positive")
     if trailing_percentage <= 0 or trailing_percentage >= 100:
         raise ValueError("Trailing percentage must be between 0 and 100")
+    if frequency not in _FREQ_MAP:
+        raise ValueError(f"Invalid frequency. Must be one of {list(_FREQ_MAP.keys())}")
 
     # Calculate stock lifetime using the full historical data
     start_date = hist_data_full.index[0]
@@ -183,84 +237,37 @@ def calculate_strategies(hist_data, hist_data_full, investment_amount, frequency
     years = int(total_years)
     months = int((total_years - years) * 12)
     
-    print(f"Stock lifetime calculation - Start date: {start_date}, End date: {end_date}")
-    print(f"Total years: {total_years}, Years: {years}, Months: {months}")
-    
-    # Filter data for timeline analysis based on user input
-    timeline_start_date = end_date - pd.DateOffset(months=timeline_months)
-    hist_data_filtered = hist_data.copy()  # Use the input hist_data for analysis
-    if timeline_months > 0:
-        hist_data_filtered = hist_data[hist_data.index >= timeline_start_date]
+    logger.debug("Stock lifetime calculation - Start date: %s, End date: %s", start_date, end_date)
+    logger.debug("Total years: %s, Years: %s, Months: %s", total_years, years, months)
     
-    if hist_data_filtered.empty:
-        raise ValueError(f"Insufficient data for the specified timeline of {timeline_months} months")
-        
     # Use full historical data for rolling returns calculations
-    print(f"Data length months: {len(hist_data_filtered)}, Total months available: {len(hist_data_full)}")
+    logger.debug("Data length months: %s, Total months available: %s", len(hist_data), len(hist_data_full))
     rolling_returns = calculate_rolling_returns(hist_data_full, investment_amount, frequency, trailing_percentage, years, months)
 
-    # Enhanced trading frequency mapping with strict business day adherence
-    freq_map = {
-        'Daily': 'B',     # Business day frequency (excludes weekends and holidays)
-        'Weekly': 'W-FRI',  # Weekly on Friday
-        'Bi-Weekly': '2W-FRI',  # Bi-weekly on Friday
-        'Monthly': 'BM',   # Business month end
-        'Annual': 'BA'    # Business year end
-    }
-    
     # Generate trading schedule based on business calendar
     trading_schedule = pd.date_range(
-        start=hist_data_filtered.index[0],
-        end=hist_data_filtered.index[-1],
-        freq=freq_map[frequency]
-    ).intersection(hist_data_filtered.index)  # Ensure dates exist in historical data
+        start=hist_data.index[0],
+        end=hist_data.index[-1],
+        freq=_FREQ_MAP[frequency]
+    )
     
-    if frequency not in freq_map:
-        raise ValueError(f"Invalid frequency. Must be one of {list(freq_map.keys())}")
-    
-    # Optimize data resampling for large datasets
+    # Resample the timeline in a single pass so bucket edges stay aligned
     try:
-        # Use efficient resampling with chunking for large datasets
-        chunk_size = 1000
-        if len(hist_data) > chunk_size:
-            chunks = [hist_data.iloc[i:i + chunk_size] for i in range(0, len(hist_data), chunk_size)]
-            resampled_chunks = []
-            
-            for chunk in chunks:
-                resampled_chunk = chunk.resample(freq_map[frequency])['Close'].last()
-                if resampled_chunk.isna().any():
-                    resampled_chunk = resampled_chunk.ffill().bfill()
-                resampled_chunks.append(resampled_chunk)
-                
-            data = pd.concat(resampled_chunks)
-        else:
-            data = hist_data.resample(freq_map[frequency])['Close'].last()
-            if data.isna().any():
-                data = data.ffill().bfill()
+        data = hist_data['Close'].resample(_FREQ_MAP[frequency]).last()
+        if data.isna().any():
+            data = data.ffill().bfill()
                 
         if data.empty:
             raise ValueError("Insufficient data after resampling")
-            
-        # Remove duplicate indices that might cause recursion
-        data = data[~data.index.duplicated(keep='first')]
         
     except Exception as e:
         raise ValueError(f"Error resampling data: {str(e)}")
     
-    # Calculate actual trading days within the specified timeline
-    business_days = pd.bdate_range(start=hist_data.index[0], end=hist_data.index[-1])
-    actual_trading_days = len(business_days)
-    
     # Calculate expected trading periods based on market calendar
-    expected_periods = {
-        'Daily': len(pd.bdate_range(start=hist_data.index[0], end=hist_data.index[-1])),
-        'Weekly': len(pd.date_range(start=hist_data.index[0], end=hist_data.index[-1], freq='W-FRI')),
-        'Bi-Weekly': len(pd.date_range(start=hist_data.index[0], end=hist_data.index[-1], freq='2W-FRI')),
-        'Monthly': len(pd.date_range(start=hist_data.index[0], end=hist_data.index[-1], freq='BME')),
-        'Annual': max(1, len(pd.date_range(start=hist_data.index[0], end=hist_data.index[-1], freq='BYE')))
-    }
+    trading_periods = len(trading_schedule)  # Same calendar as the trading schedule
+    if frequency == 'Annual':
+        trading_periods = max(1, trading_periods)
     
-    trading_periods = expected_periods[frequency]
     if trading_periods == 0:
         raise ValueError("No trading periods available after processing")
     
@@ -269,39 +276,17 @@ def calculate_strategies(hist_data, hist_data_full, investment_amount, frequency
     initial_investment = total_investment  # Ensure lump sum matches total DCA investment
     
     # DCA Strategy with strict trading day validation
-    dca_purchases = []
-    dca_total_shares = 0
-    dca_total_invested = 0
-    
-    # Use trading_schedule for purchases to ensure valid market days
-    for date in trading_schedule:
-        try:
-            # Get the closing price for the trading day
-            price = data.loc[date]
-            if pd.isna(price) or price <= 0:
-                print(f"Warning: Invalid price ({price}) on {date}, skipping purchase")
-                continue
-                
-            shares = investment_amount / price
-            dca_total_shares += shares
-            dca_total_invested += investment_amount
-            
-            dca_purchases.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'price': float(price),
-                'shares': float(shares),
-                'amount': float(investment_amount),
-                'cumulative_shares': float(dca_total_shares),
-                'total_invested': float(dca_total_invested)
-            })
-        except Exception as e:
-            print(f"Error processing DCA purchase for {date}: {str(e)}")
-            continue
+    # Align closing prices to the trading schedule in one pass; scheduled dates
+    # that are not trading days or have missing/non-positive prices are skipped
+    dca_prices = data.reindex(trading_schedule)
+    dca_prices = dca_prices[trading_schedule.isin(hist_data.index) & (dca_prices > 0)]
+    dca_price_values = dca_prices.to_numpy(dtype=np.float64)
+    dca_shares = investment_amount / dca_price_values
+    dca_cum_shares = np.cumsum(dca_shares)
+    dca_cum_invested = np.cumsum(np.full_like(dca_shares, investment_amount))
+    dca_total_shares = float(dca_cum_shares[-1]) if dca_cum_shares.size else 0
     
     # Trailing Buy Strategy with improved price tracking
-    trailing_purchases = []
-    trailing_total_shares = 0
-    trailing_total_invested = 0
     try:
         highest_price = float(data.iloc[0])  # Ensure highest_price is float
         if highest_price <= 0:
@@ -309,34 +294,13 @@ def calculate_strategies(hist_data, hist_data_full, investment_amount, frequency
     except (IndexError, ValueError) as e:
         raise ValueError(f"Error initializing trailing strategy: {str(e)}")
     
-    for date, price in data.items():
-        try:
-            if price <= 0:
-                print(f"Warning: Invalid price ({price}) on {date}, skipping analysis")
-                continue
-                
-            # Calculate price decline with protection against division by zero
-            decline = ((highest_price - price) / highest_price * 100) if highest_price > 0 else 0
-            
-            if decline >= trailing_percentage:
-                shares = investment_amount / price
-                trailing_total_shares += shares
-                trailing_total_invested += investment_amount
-                trailing_purchases.append({
-                    'date': date.strftime('%Y-%m-%d'),
-                    'price': float(price),
-                    'shares': float(shares),
-                    'amount': float(investment_amount),
-                    'decline_percentage': float(decline),
-                    'cumulative_shares': float(trailing_total_shares),
-                    'total_invested': float(trailing_total_invested)
-                })
-                highest_price = float(price)  # Reset highest price after purchase
-            
-            highest_price = float(max(highest_price, price))  # Update highest price
-        except Exception as e:
-            print(f"Error processing trailing buy for {date}: {str(e)}")
-            continue
+    prices = data.to_numpy(dtype=np.float64)
+    trailing_idx, trailing_declines = _trailing_scan(prices, float(trailing_percentage))
+    trailing_prices = prices[trailing_idx]
+    trailing_buy_shares = investment_amount / trailing_prices
+    trailing_cum_shares = np.cumsum(trailing_buy_shares)
+    trailing_cum_invested = np.cumsum(np.full_like(trailing_buy_shares, investment_amount))
+    trailing_total_shares = float(trailing_cum_shares[-1]) if trailing_cum_shares.size else 0
     
     # Calculate final portfolio values with error handling
     try:
@@ -363,29 +327,24 @@ def calculate_strategies(hist_data, hist_data_full, investment_amount, frequency
         raise ValueError(f"Error calculating final portfolio values: {str(e)}")
     
     # Calculate performance over time with proper % returns and consistent investment tracking
-    dates = [date.strftime('%Y-%m-%d') for date in data.index]
+    dates = data.index.strftime('%Y-%m-%d').tolist()
     
     # DCA performance with cumulative tracking
-    dca_cumulative = []
-    dca_shares_owned = 0
-    dca_total_invested = 0
-    for i, price in enumerate(data):
-        if i < len(dca_purchases):
-            dca_shares_owned += dca_purchases[i]['shares']
-            dca_total_invested += investment_amount
-        current_value = dca_shares_owned * price
-        dca_cumulative.append(current_value)
+    # The n-th purchase is added on the n-th bar; after the last purchase the shares stay flat
+    dca_bars = min(len(data), dca_shares.size)
+    dca_shares_owned = np.zeros(len(data))
+    dca_shares_owned[:dca_bars] = dca_cum_shares[:dca_bars]
+    if dca_bars:
+        dca_shares_owned[dca_bars:] = dca_cum_shares[dca_bars - 1]
+    dca_cumulative = (dca_shares_owned * prices).tolist()
+    dca_total_invested = float(dca_cum_invested[dca_bars - 1]) if dca_bars else 0
     
     # Trailing performance with cumulative tracking
-    trailing_cumulative = []
-    trailing_shares_owned = 0
-    trailing_total_invested = 0
-    for i, price in enumerate(data):
-        trailing_buys = [t for t in trailing_purchases if t['date'] <= dates[i]]
-        trailing_shares_owned = sum(t['shares'] for t in trailing_buys)
-        trailing_total_invested = len(trailing_buys) * investment_amount
-        current_value = trailing_shares_owned * price
-        trailing_cumulative.append(current_value)
+    # Buy indices are sorted, so the number of buys made on or before each bar
+    # is a single searchsorted over the buy indices
+    trailing_buy_counts = np.searchsorted(trailing_idx, np.arange(len(data)), side='right')
+    trailing_shares_owned = np.concatenate(([0.0], trailing_cum_shares))[trailing_buy_counts]
+    trailing_cumulative = (trailing_shares_owned * prices).tolist()
     
     # Lump sum performance using total_investment
     lump_shares = total_investment / data.iloc[0]  # Use total_investment for lump sum
@@ -393,41 +352,56 @@ def calculate_strategies(hist_data, hist_data_full, investment_amount, frequency
     
     # Ensure invested amounts are consistent
     dca_invested_over_time = [min(investment_amount * (i+1), total_investment) for i in range(len(data))]
-    trailing_invested_over_time = [min(len([t for t in trailing_purchases if t['date'] <= d]) * investment_amount, total_investment) for d in dates]
+    trailing_invested_over_time = np.minimum(trailing_buy_counts * investment_amount, total_investment).tolist()
     lump_invested_over_time = [total_investment] * len(data)  # Lump sum is always total_investment
     
     # Add daily price data
-    daily_prices = {
-        date.strftime('%Y-%m-%d'): {
-            'open': hist_data.loc[date, 'Open'],
-            'close': hist_data.loc[date, 'Close'],
-        }
-        for date in hist_data.index
-    }
+    daily_prices = hist_data[['Open', 'Close']].set_axis(['open', 'close'], axis=1)
+    daily_prices.index = hist_data.index.strftime('%Y-%m-%d')
+    daily_prices = daily_prices.to_dict(orient='index')
     
     # Define investment amounts for percentage calculations
     dca_invested = dca_total_invested
-    trailing_invested = len(trailing_purchases) * investment_amount
+    trailing_invested = trailing_idx.size * investment_amount
     lump_invested = initial_investment
     
-    # Calculate stock lifetime using full historical data
-    start_date = hist_data_full.index[0]
-    end_date = hist_data_full.index[-1]
-    total_years = (end_date - start_date).days / 365.25
-    years = int(total_years)
-    months = int((total_years - years) * 12)
-    
-    # Calculate rolling period returns with lifetime information using full historical data
-    rolling_returns = calculate_rolling_returns(hist_data_full, investment_amount, frequency, trailing_percentage, years, months)
-    
-    # Calculate actual timeline for display
-    total_years = (hist_data_full.index[-1] - hist_data_full.index[0]).days / 365.25
-    years = int(total_years)
-    months = int((total_years - years) * 12)
-    
-    # Debug logging for lifetime calculation
-    print(f"Stock lifetime calculation: Start date: {start_date}, End date: {end_date}")
-    print(f"Total years: {total_years}, Years: {years}, Months: {months}")
+    # Compute every percentage field in one guarded division; a zero base yields 0
+    percentage_names = ['dca_vs_trailing', 'dca_percentage_increase', 'trailing_percentage_increase', 'lump_percentage_increase']
+    percentage_gains = np.array([trailing_value - dca_value, dca_value - dca_invested, trailing_value - trailing_invested, lump_value - lump_invested], dtype=np.float64)
+    percentage_bases = np.array([dca_value, dca_invested, trailing_invested, lump_invested], dtype=np.float64)
+    percentages = np.divide(percentage_gains, percentage_bases, out=np.zeros_like(percentage_gains), where=percentage_bases > 0) * 100
+    percentage_summary = {name: round(float(value), 2) for name, value in zip(percentage_names, percentages)}
+    
+    # Assemble per-purchase records for the response from the columnar arrays
+    dca_purchases = [
+        {
+            'date': date,
+            'price': price,
+            'shares': shares,
+            'amount': float(investment_amount),
+            'cumulative_shares': cum_shares,
+            'total_invested': cum_invested
+        }
+        for date, price, shares, cum_shares, cum_invested in zip(
+            dca_prices.index.strftime('%Y-%m-%d'), dca_price_values, dca_shares, dca_cum_shares, dca_cum_invested
+        )
+    ]
+    
+    trailing_purchases = [
+        {
+            'date': dates[i],
+            'price': price,
+            'shares': shares,
+            'amount': float(investment_amount),
+            'decline_percentage': decline,
+            'cumulative_shares': cum_shares,
+            'total_invested': cum_invested
+        }
+        for i, price, shares, decline, cum_shares, cum_invested in zip(
+            trailing_idx, trailing_prices, trailing_buy_shares, trailing_declines,
+            trailing_cum_shares, trailing_cum_invested
+        )
+    ]
     
     return {
         'summary': {
@@ -440,10 +414,7 @@ def calculate_strategies(hist_data, hist_data_full, investment_amount, frequency
             'dca_value': round(dca_value, 2),
             'trailing_value': round(trailing_value, 2),
             'lump_value': round(lump_value, 2),
-            'dca_vs_trailing': round(((trailing_value - dca_value) / dca_value) * 100, 2),
-            'dca_percentage_increase': round(((dca_value - dca_invested) / dca_invested) * 100, 2),
-            'trailing_percentage_increase': round(((trailing_value - trailing_invested) / trailing_invested) * 100, 2) if trailing_invested > 0 else 0,
-            'lump_percentage_increase': round(((lump_value - lump_invested) / lump_invested) * 100, 2),
+            **percentage_summary,
             'dca_dollar_increase': round(dca_value - dca_invested, 2),
             'trailing_dollar_increase': round(trailing_value - trailing_invested, 2),
             'lump_dollar_increase': round(lump_value - lump_invested, 2),
@@ -0,0 +1,127 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app as app_module
+
+
+def make_history(n=800):
+    index = pd.bdate_range('2020-01-06', periods=n, tz='America/New_York')
+    closes = 50 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.02, n)))
+    return pd.DataFrame({'Open': closes, 'Close': closes}, index=index)
+
+
+VALID_BODY = {
+    'ticker': 'acme',
+    'amount': 100,
+    'frequency': 'Weekly',
+    'timeline': 12,
+    'trailingPercentage': 5,
+}
+
+
+@pytest.fixture
+def fetch_calls(monkeypatch, tmp_path):
+    """Replace yfinance with a local fake and isolate the caches for each test."""
+    calls = []
+    history = make_history()
+    monkeypatch.setattr(app_module, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(app_module, '_FETCHERS', {
+        'info': lambda ticker: calls.append(('info', ticker)) or {'longName': 'Acme Corp'},
+        'history': lambda ticker: calls.append(('history', ticker)) or history,
+    })
+    app_module._memory_cache.clear()
+    yield calls
+    app_module._memory_cache.clear()
+
+
+@pytest.fixture
+def client(fetch_calls):
+    return app_module.app.test_client()
+
+
+def test_analyze_returns_results(client):
+    response = client.post('/analyze', json=VALID_BODY)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['stock_info'] == {'name': 'Acme Corp', 'ticker': 'ACME'}
+    assert body['transactions']['dca']
+    assert len(body['performance']['dates']) == len(body['performance']['dca'])
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'data': '{not json', 'content_type': 'application/json'},
+    {'json': ['ACME']},
+    {'data': 'ticker=ACME'},
+])
+def test_invalid_json_payload_is_rejected(client, kwargs):
+    response = client.post('/analyze', **kwargs)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid JSON payload'}
+
+
+def test_missing_fields_are_rejected(client, fetch_calls):
+    response = client.post('/analyze', json={'ticker': 'ACME', 'amount': 100})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Missing required fields: frequency, timeline, trailingPercentage'}
+    assert fetch_calls == []
+
+
+@pytest.mark.parametrize('ticker', ['', 'A B', '../../TMP', 'SPY\n', 'A^B', 'X' * 11, '^' + 'A' * 10, 5])
+def test_invalid_tickers_are_rejected(client, fetch_calls, ticker):
+    response = client.post('/analyze', json={**VALID_BODY, 'ticker': ticker})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid ticker symbol'}
+    assert fetch_calls == []
+
+
+@pytest.mark.parametrize('ticker', ['SPY', 'BRK-B', 'BRK.B', '^GSPC', 'EURUSD=X', 'X' * 10, '^' + 'A' * 9])
+def test_valid_tickers_are_accepted(ticker):
+    assert app_module.TICKER_PATTERN.fullmatch(ticker)
+
+
+@pytest.mark.parametrize('amount, error', [(-5, 'Amount must be positive'), ('abc', 'Invalid amount value'), (None, 'Invalid amount value')])
+def test_invalid_amounts_are_rejected(client, amount, error):
+    response = client.post('/analyze', json={**VALID_BODY, 'amount': amount})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': error}
+
+
+def test_warm_requests_skip_fetch_and_executor(client, fetch_calls, monkeypatch):
+    assert client.post('/analyze', json=VALID_BODY).status_code == 200
+    assert sorted(fetch_calls) == [('history', 'ACME'), ('info', 'ACME')]
+
+    def fail_submit(*args, **kwargs):
+        raise AssertionError("cache hits must not use the executor")
+
+    monkeypatch.setattr(app_module.YFINANCE_EXECUTOR, 'submit', fail_submit)
+    assert client.post('/analyze', json=VALID_BODY).status_code == 200
+
+    # A fresh process only has the disk cache
+    app_module._memory_cache.clear()
+    assert client.post('/analyze', json=VALID_BODY).status_code == 200
+    assert len(fetch_calls) == 2
+
+
+def test_expired_or_unreadable_cache_is_a_miss(fetch_calls):
+    app_module.fetch('info', 'ACME')
+    path = os.path.join(app_module.CACHE_DIR, 'ACME.info.pkl')
+    assert os.listdir(app_module.CACHE_DIR) == ['ACME.info.pkl']
+
+    app_module._memory_cache.clear()
+    os.utime(path, (0, 0))
+    assert app_module.get_cached('info', 'ACME') is None
+
+    with open(path, 'wb') as f:
+        f.write(b'not a pickle')
+    assert app_module.get_cached('info', 'ACME') is None
+
+
+def test_unsafe_tickers_bypass_the_disk_cache(fetch_calls):
+    assert app_module.fetch('info', '../../TMP') == {'longName': 'Acme Corp'}
+    assert os.listdir(app_module.CACHE_DIR) == []
+    app_module._memory_cache.clear()
+    assert app_module.get_cached('info', '../../TMP') is None
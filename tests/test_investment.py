@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from investment import calculate_rolling_returns, calculate_strategies
+
+
+def make_history(closes, start='2020-01-06', index=None):
+    if index is None:
+        index = pd.bdate_range(start, periods=len(closes), tz='America/New_York')
+    closes = np.asarray(closes, dtype=np.float64)
+    return pd.DataFrame({'Open': closes, 'Close': closes}, index=index)
+
+
+def random_history(n, seed=0, start='2000-01-03'):
+    rng = np.random.default_rng(seed)
+    return make_history(50 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), start=start)
+
+
+def timeline(hist, months):
+    end = hist.index[-1]
+    return hist.loc[end - pd.DateOffset(months=months):end]
+
+
+def run(hist, months, frequency, trailing_percentage=5, amount=100.0):
+    return calculate_strategies(timeline(hist, months), hist, amount, frequency, months, trailing_percentage)
+
+
+def test_trailing_buys_follow_decline_from_high():
+    hist = make_history([100, 95, 89, 100, 110, 99, 98])
+    result = run(hist, 1, 'Daily', trailing_percentage=10)
+
+    buys = result['transactions']['trailing']
+    assert [b['date'] for b in buys] == ['2020-01-08', '2020-01-13']
+    assert [b['price'] for b in buys] == [89, 99]
+    assert buys[0]['decline_percentage'] == pytest.approx(11)
+    assert buys[1]['decline_percentage'] == pytest.approx(10)
+    assert buys[-1]['cumulative_shares'] == pytest.approx(100 / 89 + 100 / 99)
+
+
+def test_dca_skips_holidays_and_non_positive_prices():
+    hist = random_history(60, start='2020-01-06')
+    fridays = hist.index[hist.index.dayofweek == 4]
+    holiday, zero_price = fridays[2], fridays[4]
+    hist = hist.drop(holiday)
+    hist.loc[zero_price, ['Open', 'Close']] = 0.0
+
+    result = run(hist, 2, 'Weekly')
+
+    dates = [p['date'] for p in result['transactions']['dca']]
+    expected = [d.strftime('%Y-%m-%d') for d in fridays if d not in (holiday, zero_price)]
+    window_start = timeline(hist, 2).index[0]
+    assert dates == [d for d in expected if d >= window_start.strftime('%Y-%m-%d')]
+    assert holiday.strftime('%Y-%m-%d') not in dates
+    assert zero_price.strftime('%Y-%m-%d') not in dates
+
+
+def test_weekly_purchases_use_friday_close_on_long_timelines():
+    # Timelines over 1000 rows used to be resampled in chunks, which stored
+    # partial-week prices at the chunk edges
+    hist = random_history(3000, seed=1)
+    hist = hist.drop(hist.index[3::250])  # Holidays shift chunk edges off week boundaries
+    result = run(hist, 120, 'Weekly')
+
+    purchases = result['transactions']['dca']
+    assert len(purchases) > 400
+    closes = hist['Close']
+    closes.index = hist.index.strftime('%Y-%m-%d')
+    for purchase in purchases:
+        assert purchase['price'] == closes[purchase['date']]
+    assert len(set(result['performance']['dates'])) == len(result['performance']['dates'])
+
+
+def test_percentages_are_zero_when_nothing_was_invested():
+    # No Fridays means no weekly DCA purchases; a rising price means no trailing buys
+    index = pd.bdate_range('2020-01-06', periods=200, tz='America/New_York')
+    index = index[index.dayofweek != 4]
+    hist = make_history(np.linspace(10, 20, len(index)), index=index)
+
+    summary = run(hist, 6, 'Weekly', trailing_percentage=50)['summary']
+
+    assert summary['dca_value'] == 0
+    assert summary['trailing_value'] == 0
+    assert summary['dca_vs_trailing'] == 0
+    assert summary['dca_percentage_increase'] == 0
+    assert summary['trailing_percentage_increase'] == 0
+    assert summary['lump_percentage_increase'] > 0
+
+
+def test_invalid_frequency_is_rejected():
+    hist = random_history(100)
+    with pytest.raises(ValueError, match="Invalid frequency"):
+        run(hist, 3, 'Hourly')
+
+
+@pytest.mark.parametrize('frequency', ['Daily', 'Weekly', 'Bi-Weekly', 'Monthly', 'Annual'])
+def test_all_frequencies_produce_results(frequency):
+    hist = random_history(3000, seed=2)
+    result = run(hist, 60, frequency)
+    assert result['transactions']['dca']
+    assert len(result['performance']['dates']) == len(result['performance']['dca'])
+
+
+def test_rolling_returns_start_at_first_trading_day_of_period():
+    hist = random_history(400, seed=3)
+    period_start = hist.index[-1] - pd.DateOffset(months=12)
+    # Make the first day of the period a holiday
+    hist = hist.drop(hist.index[hist.index.normalize() == period_start.normalize()])
+
+    returns = calculate_rolling_returns(hist, 100, 'Daily', 5)
+
+    period = hist[hist.index >= period_start]['Close']
+    expected = (period.iloc[-1] - period.iloc[0]) / period.iloc[0] * 100
+    assert returns['1 Year']['Buy and Hold'] == pytest.approx(expected)